@@ -20,30 +20,58 @@ Environment variables (override config.yaml):
     IDRAC_SOURCE_IP     Source iDRAC IP (overrides config source.ip, legacy mode only)
     IDRAC_TARGET_IPS    Comma-separated target IPs (overrides config targets, legacy mode only)
     IDRAC_CONFIG_FILE   Path to config file (default: config.yaml)
+    IDRAC_CONFIG_CACHE  Set to 1 to cache the parsed config in ~/.cache/idrac-golden-template/
+    IDRAC_DISABLE_GEN_CACHE  Set to skip the 24h on-disk cache of detected iDRAC generations
 """
 
 import argparse
+import atexit
 import os
+import pickle
+import shutil
+import stat
 import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING
 
-import yaml
-
-from src.export_scp import export_scp
-from src.idrac_common import IdracSession, expand_targets, setup_logging
-from src.import_scp import import_scp_to_targets
+# yaml and the src.* modules (which pull in requests/urllib3) are imported
+# lazily inside the functions that need them to keep CLI startup cheap.
+if TYPE_CHECKING:
+    from src.idrac_common import IdracSession
 
 DEFAULT_CONFIG = "config.yaml"
+CONFIG_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "idrac-golden-template", "config.pkl")
+
+# Serialises console output from groups running in parallel worker threads.
+_print_lock = threading.Lock()
+
+# Source sessions are shared across commands/pipeline steps so each source
+# iDRAC keeps one authenticated keep-alive connection for the whole run.
+_SESSION_CACHE: dict[tuple[str, str], "IdracSession"] = {}
+_session_cache_lock = threading.Lock()
+
+
+def _close_sessions() -> None:
+    for session in _SESSION_CACHE.values():
+        session.close()
 
 
 def load_config(config_path: str) -> dict:
     """Load and return the YAML configuration, with env-var overrides."""
-    if not os.path.isfile(config_path):
+    try:
+        st = os.stat(config_path)
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISREG(st.st_mode):
         print(f"ERROR: Config file not found: {config_path}", file=sys.stderr)
         print("  Copy config.yaml.example to config.yaml and adjust values.", file=sys.stderr)
         sys.exit(1)
 
-    with open(config_path, "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f) or {}
+    if os.environ.get("IDRAC_CONFIG_CACHE") == "1":
+        config = _load_yaml_cached(config_path, st)
+    else:
+        config = _load_yaml(config_path)
 
     # Environment variable overrides (for CI/CD pipelines, legacy format only)
     if os.environ.get("IDRAC_SOURCE_IP"):
@@ -54,6 +82,49 @@ def load_config(config_path: str) -> dict:
     return config
 
 
+def _load_yaml(config_path: str) -> dict:
+    """Parse the config YAML file."""
+    import yaml
+
+    # libyaml-backed loader when available (much faster on large configs)
+    try:
+        from yaml import CSafeLoader as _YamlLoader
+    except ImportError:
+        from yaml import SafeLoader as _YamlLoader
+
+    with open(config_path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
+def _load_yaml_cached(config_path: str, st: os.stat_result) -> dict:
+    """Parse the config YAML, reusing a pickled copy while the file is unchanged.
+
+    The cache is keyed by (absolute path, mtime, size) taken from st, the
+    stat already done by load_config, and holds the parsed file only —
+    env-var overrides are still applied on every run.  Cache read/write
+    failures silently fall back to parsing.
+    """
+    key = (os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+    try:
+        with open(CONFIG_CACHE_PATH, "rb") as f:
+            cached_key, cached_config = pickle.load(f)
+        if cached_key == key:
+            return cached_config
+    except Exception:
+        pass
+
+    config = _load_yaml(config_path)
+    try:
+        os.makedirs(os.path.dirname(CONFIG_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{CONFIG_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump((key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, CONFIG_CACHE_PATH)
+    except OSError:
+        pass
+    return config
+
+
 def get_credentials() -> tuple[str, str]:
     """Retrieve iDRAC credentials from environment variables."""
     username = os.environ.get("IDRAC_USERNAME", "")
@@ -106,69 +177,192 @@ def select_groups(all_groups: dict[str, dict], group_name: str | None) -> dict[s
 
 def print_summary(results: dict[str, bool], group_name: str = "") -> None:
     """Print a human-readable results table."""
-    print()
     header = f"RESULTS — {group_name}" if group_name else "RESULTS SUMMARY"
-    print("=" * 60)
-    print(header)
-    print("=" * 60)
     succeeded = sum(1 for v in results.values() if v)
     failed = sum(1 for v in results.values() if not v)
+    lines = ["", "=" * 60, header, "=" * 60]
     for ip, ok in results.items():
         status = "OK" if ok else "FAILED"
-        print(f"  {ip:<20s} {status}")
-    print("-" * 60)
-    print(f"  Total: {len(results)}  |  Succeeded: {succeeded}  |  Failed: {failed}")
-    print("=" * 60)
+        lines.append(f"  {ip:<20s} {status}")
+    lines.append("-" * 60)
+    lines.append(f"  Total: {len(results)}  |  Succeeded: {succeeded}  |  Failed: {failed}")
+    lines.append("=" * 60)
+    _print_block(lines)
 
 
-def _make_session(ip: str, username: str, password: str, conn: dict) -> IdracSession:
-    """Create an IdracSession with connection settings from config."""
-    return IdracSession(
-        ip=ip,
-        username=username,
-        password=password,
-        verify_ssl=conn.get("verify_ssl", False),
-        timeout=conn.get("timeout", 30),
-        retries=conn.get("retries", 3),
+def _print_block(lines: list[str]) -> None:
+    """Print several lines atomically so parallel groups don't interleave."""
+    from src.idrac_common import flush_logging
+
+    flush_logging()
+    with _print_lock:
+        print("\n".join(lines), flush=True)
+
+
+def _parallelism(conn: dict, jobs: int) -> int:
+    """Number of worker threads for fanning out over *jobs* units of work."""
+    return max(1, min(conn.get("parallelism", 8), jobs))
+
+
+def _make_session(ip: str, username: str, password: str, sess_kwargs: dict) -> "IdracSession":
+    """Return the cached IdracSession for (ip, username), creating it if needed.
+
+    sess_kwargs comes from session_kwargs(conn), built once per command.
+    """
+    from src.idrac_common import IdracSession
+
+    key = (ip, username)
+    with _session_cache_lock:
+        session = _SESSION_CACHE.get(key)
+        if session is None:
+            session = IdracSession(ip=ip, username=username, password=password, **sess_kwargs)
+            _SESSION_CACHE[key] = session
+    return session
+
+
+def _export_kwargs(conn: dict, export_cfg: dict) -> dict:
+    """Build the export_scp keyword arguments shared by every group."""
+    return {
+        "target": export_cfg.get("target", "ALL"),
+        "export_format": export_cfg.get("format", "XML"),
+        "include": export_cfg.get("include", "Default"),
+        "output_dir": "templates",
+        "poll_interval": conn.get("poll_interval", 15),
+        "job_timeout": conn.get("job_timeout", 1800),
+        "initial_poll_interval": conn.get("initial_poll_interval", 1.0),
+    }
+
+
+def _group_by_source(groups: dict[str, dict]) -> dict[str, list[str]]:
+    """Map each source IP to the names of the groups exported from it."""
+    by_source: dict[str, list[str]] = {}
+    for name, group in groups.items():
+        by_source.setdefault(group["source_ip"], []).append(name)
+    return by_source
+
+
+def _export_source(source_ip: str, names: list[str], groups: dict[str, dict],
+                   username: str, password: str,
+                   sess_kwargs: dict, export_kwargs: dict) -> dict[str, str]:
+    """Export the SCP once from a source iDRAC for every group that uses it.
+
+    The first group's template is exported; the others receive a copy at
+    their own template path (or share the exported file if they have none).
+
+    Returns dict of group_name -> filepath.
+    """
+    from src.export_scp import export_scp
+
+    first, *others = names
+    _print_block([f"\n--- Exporting group(s) {', '.join(names)} from {source_ip} ---"])
+    session = _make_session(source_ip, username, password, sess_kwargs)
+
+    filepath = export_scp(
+        session=session,
+        output_filepath=groups[first].get("template", ""),
+        **export_kwargs,
     )
 
+    exported = {first: filepath}
+    lines = [f"Exported template for group '{first}': {filepath}"]
+    for name in others:
+        template_path = groups[name].get("template", "")
+        if template_path and os.path.abspath(template_path) != os.path.abspath(filepath):
+            os.makedirs(os.path.dirname(template_path) or ".", exist_ok=True)
+            shutil.copyfile(filepath, template_path)
+            exported[name] = template_path
+        else:
+            exported[name] = filepath
+        lines.append(f"Exported template for group '{name}': {exported[name]} (same source as '{first}')")
+    _print_block(lines)
+    return exported
+
 
 def cmd_export(config: dict, group_name: str | None = None) -> dict[str, str]:
     """Run the export workflow for one or all groups.
 
+    Groups sharing a source iDRAC are exported once; distinct sources are
+    exported concurrently (up to connection.parallelism at a time).
+
     Returns dict of group_name -> exported filepath.
     """
+    from src.idrac_common import session_kwargs
+
     username, password = get_credentials()
     conn = config.get("connection", {})
     export_cfg = config.get("export", {})
     groups = select_groups(resolve_groups(config), group_name)
 
-    exported = {}
     for name, group in groups.items():
-        source_ip = group["source_ip"]
-        if not source_ip:
+        if not group["source_ip"]:
             print(f"ERROR: No source IP configured for group '{name}'.", file=sys.stderr)
             sys.exit(1)
 
-        print(f"\n--- Exporting group '{name}' from {source_ip} ---")
-        session = _make_session(source_ip, username, password, conn)
-        template_path = group.get("template", "")
+    sess_kwargs = session_kwargs(conn)
+    export_kwargs = _export_kwargs(conn, export_cfg)
+    by_source = _group_by_source(groups)
+    exported: dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=_parallelism(conn, len(by_source))) as pool:
+        for result in pool.map(
+            lambda item: _export_source(*item, groups, username, password, sess_kwargs, export_kwargs),
+            by_source.items(),
+        ):
+            exported.update(result)
 
-        filepath = export_scp(
-            session=session,
-            target=export_cfg.get("target", "ALL"),
-            export_format=export_cfg.get("format", "XML"),
-            include=export_cfg.get("include", "Default"),
-            output_dir="templates",
-            output_filepath=template_path,
-            poll_interval=conn.get("poll_interval", 15),
-            job_timeout=conn.get("job_timeout", 1800),
-        )
+    # Report in config order regardless of which source finished first
+    return {name: exported[name] for name in groups}
 
-        exported[name] = filepath
-        print(f"Exported template for group '{name}': {filepath}")
 
-    return exported
+def _group_targets(name: str, group: dict) -> list[str]:
+    """Return the expanded, de-duplicated target IPs of a group, exiting if none are configured."""
+    from src.idrac_common import expand_targets
+
+    raw_targets = group["targets"]
+    if not raw_targets:
+        print(f"ERROR: No target IPs configured for group '{name}'.", file=sys.stderr)
+        sys.exit(1)
+    # Overlapping entries must not start two SCP jobs on the same iDRAC
+    return list(dict.fromkeys(expand_targets(raw_targets)))
+
+
+def _overlapping_groups(group_targets: dict[str, list[str]]) -> dict[str, set[str]]:
+    """Map each group to the earlier groups (in config order) it shares target IPs with.
+
+    An iDRAC runs one SCP job at a time, so a group's import must not start
+    until those groups have finished importing.
+    """
+    owners: dict[str, list[str]] = {}
+    deps: dict[str, set[str]] = {}
+    for name, targets in group_targets.items():
+        deps[name] = {owner for ip in targets for owner in owners.get(ip, ())}
+        for ip in targets:
+            owners.setdefault(ip, []).append(name)
+        if deps[name]:
+            _print_block([f"NOTE: Group '{name}' shares targets with "
+                          f"{', '.join(sorted(deps[name]))}; importing it afterwards."])
+    return deps
+
+
+def _import_one(name: str, targets: list[str], file_to_import: str,
+                username: str, password: str, config: dict) -> bool:
+    """Import a template to all targets of a single group. Returns True on full success."""
+    from src.import_scp import import_scp_to_targets
+
+    _print_block([
+        f"\n--- Importing group '{name}' ({len(targets)} targets) from {file_to_import} ---",
+        f"Targets: {', '.join(targets)}",
+    ])
+
+    results = import_scp_to_targets(
+        targets=targets,
+        username=username,
+        password=password,
+        scp_filepath=file_to_import,
+        config=config,
+    )
+
+    print_summary(results, group_name=name)
+    return all(results.values())
 
 
 def cmd_import(config: dict, scp_filepath: str | None = None,
@@ -177,20 +371,19 @@ def cmd_import(config: dict, scp_filepath: str | None = None,
 
     If scp_filepath is provided, imports that file to the group's targets.
     If scp_filepath is None, each group uses its configured template file.
+    Groups are imported concurrently (up to connection.parallelism at a time).
 
     Returns True if all imports succeeded.
     """
     username, password = get_credentials()
+    conn = config.get("connection", {})
     groups = select_groups(resolve_groups(config), group_name)
 
-    all_ok = True
+    # Validate every group up front so a bad config aborts before any import starts
+    jobs: list[tuple[str, list[str], str]] = []
+    checked_files: set[str] = set()
     for name, group in groups.items():
-        raw_targets = group["targets"]
-        if not raw_targets:
-            print(f"ERROR: No target IPs configured for group '{name}'.", file=sys.stderr)
-            sys.exit(1)
-
-        targets = expand_targets(raw_targets)
+        targets = _group_targets(name, group)
 
         # Determine which template file to use
         file_to_import = scp_filepath or group.get("template", "")
@@ -199,42 +392,119 @@ def cmd_import(config: dict, scp_filepath: str | None = None,
             print("  Provide a file argument or set 'template' in the group config.", file=sys.stderr)
             sys.exit(1)
 
-        if not os.path.isfile(file_to_import):
-            print(f"ERROR: Template file not found for group '{name}': {file_to_import}", file=sys.stderr)
-            sys.exit(1)
+        # Groups often share a file (e.g. an explicit file argument); stat it once
+        if file_to_import not in checked_files:
+            if not os.path.isfile(file_to_import):
+                print(f"ERROR: Template file not found for group '{name}': {file_to_import}", file=sys.stderr)
+                sys.exit(1)
+            checked_files.add(file_to_import)
+
+        jobs.append((name, targets, file_to_import))
+
+    # Groups sharing targets run in successive waves; disjoint groups run together
+    deps = _overlapping_groups({name: targets for name, targets, _ in jobs})
+    wave_of: dict[str, int] = {}
+    waves: list[list[tuple[str, list[str], str]]] = []
+    for job in jobs:
+        wave = max((wave_of[dep] + 1 for dep in deps[job[0]]), default=0)
+        wave_of[job[0]] = wave
+        if wave == len(waves):
+            waves.append([])
+        waves[wave].append(job)
+
+    results: list[bool] = []
+    with ThreadPoolExecutor(max_workers=_parallelism(conn, max((len(w) for w in waves), default=1))) as pool:
+        for wave_jobs in waves:
+            results.extend(pool.map(
+                lambda job: _import_one(*job, username, password, config),
+                wave_jobs,
+            ))
 
-        print(f"\n--- Importing group '{name}' ({len(targets)} targets) from {file_to_import} ---")
-        print(f"Targets: {', '.join(targets)}")
+    return all(results)
 
-        results = import_scp_to_targets(
-            targets=targets,
-            username=username,
-            password=password,
-            scp_filepath=file_to_import,
-            config=config,
-        )
 
-        print_summary(results, group_name=name)
-        if not all(results.values()):
-            all_ok = False
+def cmd_apply(config: dict, group_name: str | None = None) -> bool:
+    """Export then import for one or all groups.
+
+    Each group's import starts as soon as its own export finishes instead of
+    waiting for every group to be exported first.  Groups sharing a source
+    iDRAC share a single export; groups sharing target IPs are imported one
+    after another.
+
+    Returns True if all imports succeeded.
+    """
+    from src.idrac_common import session_kwargs
+
+    username, password = get_credentials()
+    conn = config.get("connection", {})
+    export_cfg = config.get("export", {})
+    groups = select_groups(resolve_groups(config), group_name)
 
-    return all_ok
+    group_targets: dict[str, list[str]] = {}
+    for name, group in groups.items():
+        if not group["source_ip"]:
+            print(f"ERROR: No source IP configured for group '{name}'.", file=sys.stderr)
+            sys.exit(1)
+        group_targets[name] = _group_targets(name, group)
+
+    deps = _overlapping_groups(group_targets)
+    sess_kwargs = session_kwargs(conn)
+    export_kwargs = _export_kwargs(conn, export_cfg)
+    by_source = _group_by_source(groups)
+    workers = _parallelism(conn, len(groups))
+    with ThreadPoolExecutor(max_workers=workers) as export_pool, \
+            ThreadPoolExecutor(max_workers=workers) as import_pool:
+        # Maps each outstanding future to its group name; None marks an export
+        pending = {
+            export_pool.submit(_export_source, source_ip, names, groups,
+                               username, password, sess_kwargs, export_kwargs): None
+            for source_ip, names in by_source.items()
+        }
+        exported: dict[str, str] = {}
+        started: set[str] = set()
+        finished: set[str] = set()
+        results: list[bool] = []
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                if name is None:
+                    exported.update(future.result())
+                else:
+                    finished.add(name)
+                    results.append(future.result())
+            # Start every exported group whose overlapping groups are done importing
+            for name, filepath in exported.items():
+                if name not in started and deps[name] <= finished:
+                    started.add(name)
+                    pending[import_pool.submit(
+                        _import_one, name, group_targets[name], filepath, username, password, config,
+                    )] = name
+        return all(results)
 
 
 def cmd_validate(config: dict, group_name: str | None = None) -> None:
     """Validate configuration and connectivity for one or all groups."""
+    from src.idrac_common import IdracSession, expand_targets, session_kwargs
+
     username, password = get_credentials()
     conn = config.get("connection", {})
     groups = select_groups(resolve_groups(config), group_name)
 
+    # Each iDRAC is probed once, even if it appears in several groups or roles
     all_ips: list[tuple[str, str, str]] = []
+    seen: set[str] = set()
     for name, group in groups.items():
         source_ip = group["source_ip"]
-        if source_ip:
+        if source_ip and source_ip not in seen:
+            seen.add(source_ip)
             all_ips.append((name, "source", source_ip))
         raw_targets = group.get("targets", [])
         if raw_targets:
             for ip in expand_targets(raw_targets):
+                if ip in seen:
+                    continue
+                seen.add(ip)
                 all_ips.append((name, "target", ip))
 
     if not all_ips:
@@ -242,15 +512,34 @@ def cmd_validate(config: dict, group_name: str | None = None) -> None:
         sys.exit(1)
 
     print(f"Validating connectivity to {len(all_ips)} iDRAC(s) ...")
-    failures = 0
-    for grp, role, ip in all_ips:
+
+    sess_kwargs = session_kwargs(conn)
+
+    def _probe(entry: tuple[str, str, str]) -> tuple[str, str, str, bool, object]:
+        grp, role, ip = entry
         try:
-            session = _make_session(ip, username, password, conn)
-            gen = session.initialize()
-            print(f"  [{grp}] [{role:6s}] {ip:<20s} OK  (iDRAC gen {gen})")
+            if role == "source":
+                # Kept open for the export step that usually follows
+                return grp, role, ip, True, _make_session(ip, username, password, sess_kwargs).initialize()
+            # Imports open their own session per target; log out of this one now
+            with IdracSession(ip=ip, username=username, password=password, **sess_kwargs) as session:
+                return grp, role, ip, True, session.initialize()
         except Exception as exc:
-            print(f"  [{grp}] [{role:6s}] {ip:<20s} FAIL ({exc})")
+            return grp, role, ip, False, exc
+
+    # Probe all iDRACs concurrently; a dead host then costs one timeout, not one each
+    with ThreadPoolExecutor(max_workers=min(32, len(all_ips))) as pool:
+        results = list(pool.map(_probe, all_ips))
+
+    failures = 0
+    lines = []
+    for grp, role, ip, ok, gen_or_exc in results:
+        if ok:
+            lines.append(f"  [{grp}] [{role:6s}] {ip:<20s} OK  (iDRAC gen {gen_or_exc})")
+        else:
+            lines.append(f"  [{grp}] [{role:6s}] {ip:<20s} FAIL ({gen_or_exc})")
             failures += 1
+    _print_block(lines)
 
     if failures:
         print(f"\n{failures} iDRAC(s) unreachable.")
@@ -289,9 +578,7 @@ def cmd_pipeline(config: dict, group_name: str | None = None) -> None:
 
     exported_files: dict[str, str] = {}
     for step in steps:
-        print(f"\n{'=' * 60}")
-        print(f"STEP: {step.upper()}")
-        print(f"{'=' * 60}")
+        _print_block([f"\n{'=' * 60}", f"STEP: {step.upper()}", "=" * 60])
 
         if step == "validate":
             cmd_validate(config, group_name=group_name)
@@ -306,13 +593,8 @@ def cmd_pipeline(config: dict, group_name: str | None = None) -> None:
                 sys.exit(1)
 
         elif step == "apply":
-            exported_files = cmd_export(config, group_name=group_name)
-            all_ok = True
-            for name, filepath in exported_files.items():
-                ok = cmd_import(config, scp_filepath=filepath, group_name=name)
-                if not ok:
-                    all_ok = False
-            if not all_ok:
+            ok = cmd_apply(config, group_name=group_name)
+            if not ok:
                 sys.exit(1)
 
     print(f"\nAll {len(steps)} pipeline step(s) completed.")
@@ -341,7 +623,13 @@ def main() -> None:
     sub.add_parser("pipeline", help="Run steps defined in config.yaml (pipeline.steps)")
 
     args = parser.parse_args()
+
+    from src.idrac_common import setup_logging
+
     setup_logging(verbose=args.verbose)
+    # Registered after setup_logging so it runs before the log listener stops
+    # (atexit is LIFO) and logout failures still reach stdout
+    atexit.register(_close_sessions)
     config = load_config(args.config)
 
     if args.command == "export":
@@ -350,21 +638,13 @@ def main() -> None:
 
     elif args.command == "import":
         scp_file = getattr(args, "file", None)
-        if scp_file and not os.path.isfile(scp_file):
-            print(f"ERROR: File not found: {scp_file}", file=sys.stderr)
-            sys.exit(1)
+        # cmd_import checks that the file exists
         ok = cmd_import(config, scp_filepath=scp_file, group_name=args.group)
         sys.exit(0 if ok else 1)
 
     elif args.command == "apply":
-        exported = cmd_export(config, group_name=args.group)
-        print()
-        all_ok = True
-        for name, filepath in exported.items():
-            ok = cmd_import(config, scp_filepath=filepath, group_name=name)
-            if not ok:
-                all_ok = False
-        sys.exit(0 if all_ok else 1)
+        ok = cmd_apply(config, group_name=args.group)
+        sys.exit(0 if ok else 1)
 
     elif args.command == "validate":
         cmd_validate(config, group_name=args.group)
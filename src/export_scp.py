@@ -12,13 +12,29 @@ from datetime import datetime, timezone
 
 from src.idrac_common import IdracSession
 
+try:
+    import orjson
+except ImportError:  # optional C-accelerated encoder
+    orjson = None
+
 logger = logging.getLogger("idrac")
 
+# Last-resort locator for an XML SCP embedded anywhere in the raw task body.
+# Anchored on the full opening tag and non-greedy, so a miss fails fast instead
+# of backtracking across the whole multi-MB body.
+_SCP_XML_RE = re.compile(rb"<SystemConfiguration\b[^>]*>.*?</SystemConfiguration>", re.DOTALL)
+
+# Last-resort locator for the opening brace of a JSON SCP object in the raw body
+_SCP_JSON_KEY_RE = re.compile(r'("SystemConfiguration(?:Profile)?"\s*:\s*\{)')
+
+# Write large SCP payloads in slices so only one slice is ever encoded at a time
+_WRITE_CHUNK_SIZE = 64 * 1024
+
 
 def export_scp(session: IdracSession, target: str = "ALL", export_format: str = "XML",
                include: str = "Default", output_dir: str = "templates",
                output_filepath: str = "", poll_interval: int = 15,
-               job_timeout: int = 1800) -> str:
+               job_timeout: int = 1800, initial_poll_interval: float = 1.0) -> str:
     """Export the Server Configuration Profile from a single iDRAC.
 
     Args:
@@ -28,8 +44,9 @@ def export_scp(session: IdracSession, target: str = "ALL", export_format: str =
         include: Export options (Default, IncludeReadOnly, IncludePasswordHashValues).
         output_dir: Directory to write the exported file into (ignored if output_filepath is set).
         output_filepath: If set, write the SCP to this exact path instead of auto-generating.
-        poll_interval: Seconds between job polls.
+        poll_interval: Maximum seconds between job polls.
         job_timeout: Max seconds to wait for export job.
+        initial_poll_interval: Seconds before the first job poll.
 
     Returns:
         Path to the exported SCP file.
@@ -48,11 +65,15 @@ def export_scp(session: IdracSession, target: str = "ALL", export_format: str =
     if include != "Default" and session.idrac_version >= 9:
         payload["IncludeInExport"] = include
 
-    logger.info("--- EXPORT SCP FROM %s ---", session.ip)
-    logger.info("  Target components : %s", target)
-    logger.info("  Format            : %s", export_format)
-    logger.info("  Include           : %s", include)
-    logger.info("  POST %s", uri)
+    # One record per block so parallel exports don't interleave line by line
+    logger.info(
+        "--- EXPORT SCP FROM %s ---\n"
+        "  Target components : %s\n"
+        "  Format            : %s\n"
+        "  Include           : %s\n"
+        "  POST %s",
+        session.ip, target, export_format, include, uri,
+    )
 
     resp = session.post(uri, json=payload)
 
@@ -70,7 +91,9 @@ def export_scp(session: IdracSession, target: str = "ALL", export_format: str =
     logger.info("  Export job created: %s", job_id)
 
     # Poll until completion
-    task_data = session.poll_job(job_id, poll_interval=poll_interval, job_timeout=job_timeout)
+    task_data, raw_content = session.poll_job_raw(job_id, poll_interval=poll_interval,
+                                                  job_timeout=job_timeout,
+                                                  initial_poll_interval=initial_poll_interval)
 
     task_state = task_data.get("TaskState", "Unknown")
     if task_state != "Completed":
@@ -79,7 +102,7 @@ def export_scp(session: IdracSession, target: str = "ALL", export_format: str =
         raise RuntimeError(f"Export job {job_id} finished with state '{task_state}': {msg_text}")
 
     # Extract configuration data from task response
-    scp_content = _extract_scp_content(task_data, export_format)
+    scp_content = _extract_scp_content(task_data, export_format, raw_content)
     if not scp_content:
         raise RuntimeError(f"Export job {job_id} completed but returned no configuration data")
 
@@ -95,21 +118,38 @@ def export_scp(session: IdracSession, target: str = "ALL", export_format: str =
         filename = f"scp_{safe_ip}_{timestamp}.{ext}"
         filepath = os.path.join(output_dir, filename)
 
+    size_kb = _write_scp_file(filepath, scp_content) / 1024
+    logger.info("  Exported SCP written to: %s (%.1f KB)\n--- EXPORT COMPLETE ---", filepath, size_kb)
+    return filepath
+
+
+def _write_scp_file(filepath: str, scp_content: str) -> int:
+    """Write the SCP to disk in fixed-size slices and return the size in bytes.
+
+    Writing the whole string at once makes the text layer encode a second
+    full-size copy of a potentially multi-MB payload; slicing bounds that
+    to one chunk.
+    """
     with open(filepath, "w", encoding="utf-8") as f:
-        f.write(scp_content)
+        for offset in range(0, len(scp_content), _WRITE_CHUNK_SIZE):
+            f.write(scp_content[offset: offset + _WRITE_CHUNK_SIZE])
+        return f.tell()
 
-    size_kb = os.path.getsize(filepath) / 1024
-    logger.info("  Exported SCP written to: %s (%.1f KB)", filepath, size_kb)
-    logger.info("--- EXPORT COMPLETE ---")
-    return filepath
+
+def _dumps_json(obj) -> str:
+    """Pretty-print a JSON SCP with 2-space indentation, via orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2)
 
 
-def _extract_scp_content(task_data: dict, export_format: str) -> str:
+def _extract_scp_content(task_data: dict, export_format: str, raw_content: bytes = b"") -> str:
     """Extract SCP payload from the Redfish task response.
 
     Dell iDRAC returns the configuration data inside the task's
     HttpHeaders or as part of the Oem response body depending on
-    firmware version.
+    firmware version.  raw_content is the undecoded body of that
+    response, used by the last-resort scan.
     """
     # Try Messages -> Message field (common on newer firmware)
     messages = task_data.get("Messages", [])
@@ -119,7 +159,7 @@ def _extract_scp_content(task_data: dict, export_format: str) -> str:
         dell = oem.get("Dell", {})
         if "ServerConfigurationProfile" in dell:
             if export_format.upper() == "JSON":
-                return json.dumps(dell["ServerConfigurationProfile"], indent=2)
+                return _dumps_json(dell["ServerConfigurationProfile"])
             # XML is returned as-is
             return dell["ServerConfigurationProfile"]
 
@@ -137,21 +177,21 @@ def _extract_scp_content(task_data: dict, export_format: str) -> str:
     if export_format.upper() == "JSON":
         for key in ("SystemConfigurationProfile", "SystemConfiguration"):
             if key in task_data:
-                return json.dumps(task_data[key], indent=2)
+                return _dumps_json(task_data[key])
     else:
         for key in ("SystemConfiguration", "SystemConfigurationProfile"):
             if key in task_data:
                 value = task_data[key]
                 return value if isinstance(value, str) else json.dumps(value)
 
-    # Last resort: regex scan of the raw serialised task data
-    raw = json.dumps(task_data)
+    # Last resort: regex scan of the raw task response body
     if export_format.upper() == "XML":
-        match = re.search(r"(<SystemConfiguration.*</SystemConfiguration>)", raw, re.DOTALL)
+        match = _SCP_XML_RE.search(raw_content)
         if match:
-            return match.group(1)
+            return match.group(0).decode("utf-8")
     else:
-        match = re.search(r'("SystemConfiguration(?:Profile)?"\s*:\s*\{)', raw)
+        raw = raw_content.decode("utf-8", errors="replace")
+        match = _SCP_JSON_KEY_RE.search(raw)
         if match:
             # Walk forward from the opening brace to find the matching close brace
             start = raw.index("{", match.start())
@@ -164,7 +204,7 @@ def _extract_scp_content(task_data: dict, export_format: str) -> str:
                     if depth == 0:
                         break
             try:
-                return json.dumps(json.loads(raw[start: i + 1]), indent=2)
+                return _dumps_json(json.loads(raw[start: i + 1]))
             except json.JSONDecodeError:
                 pass
 
@@ -4,19 +4,34 @@ Based on Dell iDRAC-Redfish-Scripting patterns:
 https://github.com/dell/iDRAC-Redfish-Scripting/
 """
 
+import atexit
+import functools
 import ipaddress
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
+import threading
 import time
+from urllib.parse import urlsplit
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger("idrac")
 
 # Redfish base paths
 MANAGERS_URI = "/redfish/v1/Managers/iDRAC.Embedded.1"
 TASK_SERVICE_URI = "/redfish/v1/TaskService/Tasks"
+SESSIONS_URI = "/redfish/v1/SessionService/Sessions"
+
+# Methods that are safe to resend after a timeout or truncated response
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "DELETE"})
 
 # OEM action suffixes by iDRAC generation
 OEM_ACTIONS = {
@@ -24,18 +39,50 @@ OEM_ACTIONS = {
     "legacy": "EID_674_Manager",
 }
 
+# On-disk cache of per-IP generation detection (set IDRAC_DISABLE_GEN_CACHE to bypass)
+GEN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".idrac-golden-template", "gen-cache.json")
+GEN_CACHE_TTL = 24 * 3600
+_gen_cache_lock = threading.Lock()
+_gen_cache: dict | None = None  # loaded from GEN_CACHE_PATH on first use
+_gen_cache_dirty: dict[str, dict] = {}  # new entries, written once at exit
+
+
+# Records waiting for the stdout listener started by setup_logging
+_log_queue: queue.Queue = queue.Queue(-1)
+
 
 def setup_logging(verbose: bool = False) -> None:
     """Configure structured logging for pipeline readability."""
     level = logging.DEBUG if verbose else logging.INFO
     fmt = "%(asctime)s [%(levelname)-7s] %(message)s"
-    logging.basicConfig(level=level, format=fmt, datefmt="%Y-%m-%d %H:%M:%S", stream=sys.stdout)
+    root = logging.getLogger()
+    # Like basicConfig, leave an already configured root logger alone
+    if not root.handlers:
+        root.setLevel(level)
+        # Workers only enqueue records; a single listener thread writes them to
+        # stdout, so parallel targets never block on the stream handler's lock
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter(fmt, datefmt="%Y-%m-%d %H:%M:%S"))
+        root.addHandler(logging.handlers.QueueHandler(_log_queue))
+        listener = logging.handlers.QueueListener(_log_queue, handler)
+        listener.start()
+        atexit.register(listener.stop)
     # Silence noisy libraries unless debugging
     if not verbose:
         logging.getLogger("urllib3").setLevel(logging.WARNING)
         logging.getLogger("requests").setLevel(logging.WARNING)
 
 
+def flush_logging() -> None:
+    """Block until every queued log record has been written to stdout.
+
+    Call before printing directly, so the output lands after the log lines
+    that preceded it.
+    """
+    if logging.getLogger().handlers:
+        _log_queue.join()
+
+
 def suppress_insecure_warnings() -> None:
     """Suppress SSL warnings when using self-signed iDRAC certificates."""
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -51,7 +98,15 @@ def expand_targets(targets: list[str]) -> list[str]:
     Supports:
       - Single IPs:  "192.168.1.10"
       - Dash ranges: "192.168.1.10-192.168.1.20"
+
+    Results are memoised, so repeated calls for the same group (e.g. across
+    pipeline steps) skip the expansion.
     """
+    return list(_expand_targets_cached(tuple(targets)))
+
+
+@functools.lru_cache(maxsize=256)
+def _expand_targets_cached(targets: tuple[str, ...]) -> tuple[str, ...]:
     expanded = []
     for entry in targets:
         entry = entry.strip()
@@ -61,53 +116,222 @@ def expand_targets(targets: list[str]) -> list[str]:
             end = ipaddress.IPv4Address(end_str.strip())
             if start > end:
                 raise ValueError(f"Invalid IP range: {entry} (start > end)")
-            current = start
-            while current <= end:
-                expanded.append(str(current))
-                current += 1
+            # Format octets from the integer directly; avoids one IPv4Address per IP
+            expanded.extend(
+                f"{i >> 24}.{(i >> 16) & 0xFF}.{(i >> 8) & 0xFF}.{i & 0xFF}"
+                for i in range(int(start), int(end) + 1)
+            )
         else:
             # Validate it is a proper IP
             ipaddress.IPv4Address(entry)
             expanded.append(entry)
-    return expanded
+    return tuple(expanded)
+
+
+def session_kwargs(conn: dict) -> dict:
+    """Build IdracSession keyword arguments from the config 'connection' section."""
+    return {
+        "verify_ssl": conn.get("verify_ssl", False),
+        "timeout": conn.get("timeout", 30),
+        "retries": conn.get("retries", 3),
+        "pool_size": conn.get("pool_size", 4),
+    }
+
+
+def _read_gen_cache() -> dict:
+    try:
+        with open(GEN_CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return cache if isinstance(cache, dict) else {}
+
+
+def _gen_cache_entry(ip: str) -> dict | None:
+    """Return the fresh, well-formed cache entry for ip, or None.  Caller holds the lock."""
+    global _gen_cache
+    if _gen_cache is None:
+        _gen_cache = _read_gen_cache()
+    entry = _gen_cache.get(ip)
+    if (not isinstance(entry, dict)
+            or not isinstance(entry.get("version"), int)
+            or not isinstance(entry.get("oem_action_uris", {}), dict)
+            or not isinstance(entry.get("ts"), (int, float))
+            or time.time() - entry["ts"] >= GEN_CACHE_TTL):
+        return None
+    return entry
+
+
+def _gen_cache_get(ip: str) -> dict | None:
+    """Return the cached generation entry for ip, or None if missing, stale, malformed, or disabled."""
+    if os.environ.get("IDRAC_DISABLE_GEN_CACHE"):
+        return None
+    with _gen_cache_lock:
+        return _gen_cache_entry(ip)
+
+
+def _gen_cache_put(ip: str, entry: dict) -> None:
+    """Record a generation entry for ip; the file is rewritten once, at exit."""
+    if os.environ.get("IDRAC_DISABLE_GEN_CACHE"):
+        return
+    with _gen_cache_lock:
+        cached = _gen_cache_entry(ip)
+        if cached is not None and all(cached.get(key) == value for key, value in entry.items()):
+            return
+        if not _gen_cache_dirty:
+            atexit.register(_flush_gen_cache)
+        _gen_cache[ip] = _gen_cache_dirty[ip] = {**entry, "ts": time.time()}
+
+
+def _flush_gen_cache() -> None:
+    """Merge new entries into the cache file, replacing it atomically."""
+    with _gen_cache_lock:
+        if not _gen_cache_dirty:
+            return
+        # Re-read so entries written by other runs since startup are kept
+        cache = _read_gen_cache()
+        cache.update(_gen_cache_dirty)
+        _gen_cache_dirty.clear()
+        tmp_path = f"{GEN_CACHE_PATH}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(GEN_CACHE_PATH), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, GEN_CACHE_PATH)
+        except OSError as exc:
+            logger.debug("  Could not update generation cache %s: %s", GEN_CACHE_PATH, exc)
 
 
 class IdracSession:
     """Manages authenticated Redfish sessions to a single iDRAC."""
 
     def __init__(self, ip: str, username: str, password: str, verify_ssl: bool = False,
-                 timeout: int = 30, retries: int = 3):
+                 timeout: int = 30, retries: int = 3, pool_size: int = 4,
+                 max_backoff: float = 30):
         self.ip = ip
         self.username = username
         self.password = password
         self.verify_ssl = verify_ssl
         self.timeout = timeout
         self.retries = retries
+        self.max_backoff = max_backoff
         self.base_url = f"https://{ip}"
         self.idrac_version: int | None = None
+        self._oem_action_uris: dict[str, str] = {}
+        self._oem_prefix = ""
+        self._model = ""
+        self._token: str | None = None
+        self._session_uri: str | None = None
+        self._init_lock = threading.Lock()
+
+        # One keep-alive connection pool per iDRAC, so job polls reuse the TLS session.
+        # Connection errors are retried by _request; the adapter only retries
+        # transient 5xx answers to idempotent GETs (never a job-creating POST).
+        self._http = requests.Session()
+        self._http.auth = (username, password)
+        self._http.verify = verify_ssl
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                connect=0,
+                read=0,
+                backoff_factor=0.3,
+                status_forcelist=(500, 502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            ),
+        )
+        self._http.mount("https://", adapter)
 
     def _request(self, method: str, uri: str, **kwargs) -> requests.Response:
-        """Execute an HTTP request with retry logic."""
+        """Execute an HTTP request with retry logic.
+
+        Connection failures are always retried.  Read timeouts and truncated
+        responses are only retried for idempotent methods, since a POST may
+        already have created a job.  Waits grow exponentially up to
+        max_backoff with +/-25% jitter, so many workers hitting the same
+        flapping iDRAC don't retry in lockstep.
+        """
         url = f"{self.base_url}{uri}"
-        kwargs.setdefault("verify", self.verify_ssl)
         kwargs.setdefault("timeout", self.timeout)
-        kwargs.setdefault("auth", (self.username, self.password))
+        if method.upper() in IDEMPOTENT_METHODS:
+            retryable = (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                         requests.exceptions.ChunkedEncodingError)
+        else:
+            retryable = (requests.exceptions.ConnectionError,)
 
         last_exc = None
         for attempt in range(1, self.retries + 1):
             try:
                 logger.debug("  %s %s (attempt %d/%d)", method.upper(), url, attempt, self.retries)
-                resp = requests.request(method, url, **kwargs)
+                token = self._token
+                resp = self._http.request(method, url, **kwargs)
+                if resp.status_code == 401 and token is not None and uri != SESSIONS_URI:
+                    # Session token expired (e.g. iDRAC idle timeout): log in again, retry once
+                    self._relogin(token)
+                    resp = self._http.request(method, url, **kwargs)
                 return resp
-            except requests.exceptions.ConnectionError as exc:
+            except retryable as exc:
                 last_exc = exc
                 if attempt < self.retries:
-                    wait = 2 ** attempt
-                    logger.warning("  Connection to %s failed (attempt %d/%d), retrying in %ds ...",
+                    wait = min(self.max_backoff, 2 ** attempt) * (0.75 + 0.5 * random.random())
+                    logger.warning("  Connection to %s failed (attempt %d/%d), retrying in %.1fs ...",
                                    self.ip, attempt, self.retries, wait)
                     time.sleep(wait)
         raise ConnectionError(f"Failed to connect to {self.ip} after {self.retries} attempts: {last_exc}")
 
+    def _login(self) -> None:
+        """Open a Redfish session and authenticate further requests with its token.
+
+        Saves the iDRAC from re-checking the password on every poll.  Falls
+        back to HTTP Basic auth if no token is handed out.
+        """
+        resp = self.post(SESSIONS_URI, json={"UserName": self.username, "Password": self.password})
+        token = resp.headers.get("X-Auth-Token", "")
+        if resp.status_code not in (200, 201) or not token:
+            logger.debug("  No Redfish session token from %s (HTTP %d), using basic auth",
+                         self.ip, resp.status_code)
+            return
+        self._token = token
+        self._session_uri = urlsplit(resp.headers.get("Location", "")).path or None
+        self._http.headers["X-Auth-Token"] = token
+        self._http.auth = None
+        logger.debug("  Opened Redfish session on %s: %s", self.ip, self._session_uri)
+
+    def _relogin(self, stale_token: str) -> None:
+        """Replace an expired session token, once even if several threads notice."""
+        with self._init_lock:
+            if self._token != stale_token:
+                return
+            logger.info("  Redfish session on %s expired, logging in again ...", self.ip)
+            self._reset_auth()
+            self._login()
+
+    def _reset_auth(self) -> None:
+        """Forget the session token and go back to HTTP Basic auth."""
+        self._http.headers.pop("X-Auth-Token", None)
+        self._http.auth = (self.username, self.password)
+        self._token = None
+        self._session_uri = None
+
+    def close(self) -> None:
+        """Log out of the Redfish session (if any) and release pooled connections."""
+        if self._session_uri:
+            try:
+                self._http.delete(f"{self.base_url}{self._session_uri}", timeout=self.timeout)
+            except requests.exceptions.RequestException as exc:
+                logger.debug("  Could not close Redfish session on %s: %s", self.ip, exc)
+            self._reset_auth()
+        self._http.close()
+
+    def __enter__(self) -> "IdracSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
     def get(self, uri: str, **kwargs) -> requests.Response:
         return self._request("GET", uri, **kwargs)
 
@@ -117,13 +341,47 @@ class IdracSession:
     def initialize(self) -> int:
         """Verify iDRAC Redfish support and detect generation in a single request.
 
+        The same manager document also provides the OEM action targets used
+        by oem_action_uri.  Also opens a Redfish session so later requests
+        use a token instead of Basic auth.
+
         Returns:
             Detected iDRAC generation (8, 9, or 10).
         """
         if self.idrac_version is not None:
             return self.idrac_version
+        with self._init_lock:
+            # Shared sessions may be initialised from several threads; log in once
+            if self.idrac_version is None:
+                self._initialize()
+        return self.idrac_version
 
+    def _initialize(self) -> None:
         logger.info("  Connecting to iDRAC %s ...", self.ip)
+        cached = _gen_cache_get(self.ip)
+        if cached is not None:
+            # A successful login proves reachability and credentials on its own,
+            # so the manager GET can be skipped while the cached entry is fresh
+            self._login()
+            if self._token is not None:
+                self.idrac_version = cached["version"]
+                self._oem_action_uris.update(cached.get("oem_action_uris", {}))
+                self._oem_prefix = OEM_ACTIONS["v10"] if self.idrac_version >= 10 else OEM_ACTIONS["legacy"]
+                logger.info("  iDRAC %s is reachable; cached generation: %d (model: %s)",
+                            self.ip, self.idrac_version, cached.get("model", ""))
+                return
+
+        self._read_manager()
+        _gen_cache_put(self.ip, {
+            "version": self.idrac_version,
+            "model": self._model,
+            "oem_action_uris": dict(self._oem_action_uris),
+        })
+        if self._token is None and cached is None:
+            self._login()
+
+    def _read_manager(self) -> None:
+        """Fetch the manager document and derive generation and OEM action URIs."""
         resp = self.get(MANAGERS_URI)
         if resp.status_code == 401:
             raise PermissionError(f"Authentication failed for {self.ip} - check credentials")
@@ -133,9 +391,16 @@ class IdracSession:
             )
         logger.info("  iDRAC %s is reachable (HTTP 200).", self.ip)
 
-        model = resp.json().get("Model", "")
+        manager = resp.json()
+        model = self._model = manager.get("Model", "")
         logger.debug("  iDRAC model string: %s", model)
 
+        # Keys look like "#OemManager.v1_4_0.OemManager#OemManager.ExportSystemConfiguration"
+        oem_actions = manager.get("Actions", {}).get("Oem", {})
+        for key, action in oem_actions.items():
+            if isinstance(action, dict) and action.get("target"):
+                self._oem_action_uris[key.rsplit(".", 1)[-1]] = action["target"]
+
         if "12" in model or "13" in model:
             self.idrac_version = 8
         elif "14" in model or "15" in model or "16" in model:
@@ -143,20 +408,48 @@ class IdracSession:
         else:
             self.idrac_version = 10
 
+        self._oem_prefix = OEM_ACTIONS["v10"] if self.idrac_version >= 10 else OEM_ACTIONS["legacy"]
         logger.info("  Detected iDRAC generation: %d (model: %s)", self.idrac_version, model)
-        return self.idrac_version
 
     def oem_action_uri(self, action: str) -> str:
-        """Build the correct OEM action URI based on iDRAC generation."""
+        """Return the OEM action URI advertised by the iDRAC, or build it from the generation.
+
+        Built URIs are remembered, so each action is resolved once per session.
+        """
         if self.idrac_version is None:
             self.initialize()
-        prefix = OEM_ACTIONS["v10"] if self.idrac_version >= 10 else OEM_ACTIONS["legacy"]
-        return f"{MANAGERS_URI}/Actions/Oem/{prefix}.{action}"
+        uri = self._oem_action_uris.get(action)
+        if uri is None:
+            uri = self._oem_action_uris[action] = f"{MANAGERS_URI}/Actions/Oem/{self._oem_prefix}.{action}"
+        return uri
+
+    def poll_job(self, job_id: str, poll_interval: int = 15, job_timeout: int = 1800,
+                 initial_poll_interval: float = 1.0) -> dict:
+        """Poll a Redfish task until completion or timeout.
 
-    def poll_job(self, job_id: str, poll_interval: int = 15, job_timeout: int = 1800) -> dict:
+        Returns the final task response dict (see poll_job_raw).
+        """
+        data, _ = self.poll_job_raw(job_id, poll_interval=poll_interval, job_timeout=job_timeout,
+                                    initial_poll_interval=initial_poll_interval)
+        return data
+
+    def poll_job_raw(self, job_id: str, poll_interval: int = 15, job_timeout: int = 1800,
+                     initial_poll_interval: float = 1.0) -> tuple[dict, bytes]:
         """Poll a Redfish task until completion or timeout.
 
-        Returns the final task response dict.
+        The wait between polls starts at initial_poll_interval and grows by
+        1.5x per poll up to poll_interval, so short jobs are noticed quickly
+        and long jobs are not hammered.  The wait drops back to
+        initial_poll_interval whenever the TaskState changes, since one
+        transition is often followed by the next.  A numeric Retry-After
+        header from the iDRAC takes precedence, floored at
+        initial_poll_interval and capped at the time left before job_timeout.  When the iDRAC sends an
+        ETag, polls are conditional: an unchanged task answers 304 and the
+        previously parsed body is reused.
+
+        Returns the final task response dict, plus the raw body of the
+        response that carried the task payload (so callers can scan it
+        without re-serialising the dict).
 
         Note: Dell iDRAC9 (and some iDRAC8) firmware embeds the SCP payload in
         an intermediate poll response whose TaskState is still "Unknown" or
@@ -168,7 +461,13 @@ class IdracSession:
         uri = f"{TASK_SERVICE_URI}/{job_id}"
         logger.info("  Polling job %s (interval=%ds, timeout=%ds) ...", job_id, poll_interval, job_timeout)
         start = time.time()
+        initial_wait = min(initial_poll_interval, poll_interval)
+        interval = initial_wait
+        prev_state: str | None = None
+        etag = ""
+        data: dict = {}
         last_rich_data: dict | None = None  # intermediate response that may carry SCP payload
+        last_rich_content = b""
 
         while True:
             elapsed = time.time() - start
@@ -177,8 +476,11 @@ class IdracSession:
                     f"Job {job_id} on {self.ip} did not complete within {job_timeout}s"
                 )
 
-            resp = self.get(uri)
-            data = resp.json()
+            resp = self.get(uri, headers={"If-None-Match": etag} if etag else None)
+            unchanged = resp.status_code == 304 or (etag and resp.headers.get("ETag") == etag)
+            if not unchanged:
+                data = resp.json()
+                etag = resp.headers.get("ETag", "")
             task_state = data.get("TaskState", "Unknown")
             message = data.get("Messages", [{}])[0].get("Message", "")
 
@@ -187,15 +489,27 @@ class IdracSession:
 
             if task_state not in ("Completed", "CompletedWithErrors", "Failed", "Exception"):
                 # Cache any substantial non-terminal response; it may contain the SCP data
-                if len(resp.content) > 1024:
+                if not unchanged and len(resp.content) > 1024:
                     last_rich_data = data
+                    last_rich_content = resp.content
 
             if task_state in ("Completed", "CompletedWithErrors", "Failed", "Exception"):
                 if last_rich_data is not None:
                     # Merge: SCP payload keys come from the cached intermediate response;
                     # terminal-state fields (TaskState, Messages) from the final response
                     # take priority via the right-hand update.
-                    return {**last_rich_data, **data}
-                return data
-
-            time.sleep(poll_interval)
+                    return {**last_rich_data, **data}, last_rich_content
+                return data, resp.content
+
+            if task_state != prev_state:
+                interval = initial_wait
+                prev_state = task_state
+
+            retry_after = resp.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                # Honour the iDRAC's hint, but never busy-poll on a tiny value
+                # and never sleep past job_timeout
+                time.sleep(min(max(float(retry_after), initial_wait), max(0.0, job_timeout - elapsed)))
+            else:
+                time.sleep(interval)
+            interval = min(interval * 1.5, poll_interval)
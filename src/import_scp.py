@@ -4,17 +4,27 @@ Based on Dell ImportSystemConfigurationLocalFilenameREDFISH.py:
 https://github.com/dell/iDRAC-Redfish-Scripting/
 """
 
+import functools
+import json
 import logging
+import mmap
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from src.idrac_common import IdracSession
+from src.idrac_common import IdracSession, session_kwargs
 
 logger = logging.getLogger("idrac")
 
+# Whitespace between XML tags, collapsed before building the ImportBuffer
+_WS_BETWEEN_TAGS = re.compile(rb">\s+<")
+
 
 def import_scp(session: IdracSession, scp_filepath: str, target: str = "ALL",
                shutdown_type: str = "Graceful", host_power_state: str = "On",
-               poll_interval: int = 15, job_timeout: int = 1800) -> bool:
+               poll_interval: int = 15, job_timeout: int = 1800,
+               initial_poll_interval: float = 1.0, scp_content: str | None = None,
+               body: bytes | None = None) -> bool:
     """Import a Server Configuration Profile to a single iDRAC.
 
     Args:
@@ -23,39 +33,40 @@ def import_scp(session: IdracSession, scp_filepath: str, target: str = "ALL",
         target: Components to import (ALL, BIOS, IDRAC, NIC, RAID, etc.).
         shutdown_type: Graceful, Forced, or NoReboot.
         host_power_state: On or Off after import.
-        poll_interval: Seconds between job polls.
+        poll_interval: Maximum seconds between job polls.
         job_timeout: Max seconds to wait for import job.
+        initial_poll_interval: Seconds before the first job poll.
+        scp_content: Already collapsed SCP content; read from scp_filepath if None.
+        body: Already encoded request body for scp_content; built here if None.
 
     Returns:
         True if import completed successfully, False otherwise.
     """
     session.initialize()
 
-    logger.info("--- IMPORT SCP TO %s ---", session.ip)
-    logger.info("  Source file     : %s", scp_filepath)
-    logger.info("  Target          : %s", target)
-    logger.info("  Shutdown type   : %s", shutdown_type)
-    logger.info("  Host power state: %s", host_power_state)
+    # One record per block so parallel imports don't interleave line by line
+    logger.info(
+        "--- IMPORT SCP TO %s ---\n"
+        "  Source file     : %s\n"
+        "  Target          : %s\n"
+        "  Shutdown type   : %s\n"
+        "  Host power state: %s",
+        session.ip, scp_filepath, target, shutdown_type, host_power_state,
+    )
 
     # Read and prepare the SCP file content
-    scp_content = _read_scp_file(scp_filepath)
+    if scp_content is None:
+        scp_content = _read_scp_file(scp_filepath)
     if not scp_content:
         logger.error("  SCP file is empty or unreadable: %s", scp_filepath)
         return False
 
     uri = session.oem_action_uri("ImportSystemConfiguration")
-
-    payload = {
-        "ImportBuffer": scp_content,
-        "ShutdownType": shutdown_type,
-        "HostPowerState": host_power_state,
-        "ShareParameters": {
-            "Target": target,
-        },
-    }
+    if body is None:
+        body = _import_payload(scp_content, target, shutdown_type, host_power_state)
 
     logger.info("  POST %s", uri)
-    resp = session.post(uri, json=payload)
+    resp = session.post(uri, data=body, headers={"Content-Type": "application/json"})
 
     if resp.status_code not in (200, 202):
         logger.error("  Import request failed on %s: HTTP %d", session.ip, resp.status_code)
@@ -72,25 +83,28 @@ def import_scp(session: IdracSession, scp_filepath: str, target: str = "ALL",
     logger.info("  Import job created: %s", job_id)
 
     # Poll until completion
-    task_data = session.poll_job(job_id, poll_interval=poll_interval, job_timeout=job_timeout)
+    task_data = session.poll_job(job_id, poll_interval=poll_interval, job_timeout=job_timeout,
+                                 initial_poll_interval=initial_poll_interval)
 
     task_state = task_data.get("TaskState", "Unknown")
     messages = task_data.get("Messages", [])
     msg_text = "; ".join(m.get("Message", "") for m in messages if m.get("Message"))
 
     if task_state == "Completed":
-        logger.info("  Import to %s SUCCEEDED: %s", session.ip, msg_text)
-        logger.info("--- IMPORT COMPLETE ---")
+        logger.info("  Import to %s SUCCEEDED: %s\n--- IMPORT COMPLETE ---", session.ip, msg_text)
         return True
 
-    logger.error("  Import to %s FAILED (state: %s): %s", session.ip, task_state, msg_text)
-    logger.info("--- IMPORT FAILED ---")
+    logger.error("  Import to %s FAILED (state: %s): %s\n--- IMPORT FAILED ---",
+                 session.ip, task_state, msg_text)
     return False
 
 
 def import_scp_to_targets(targets: list[str], username: str, password: str,
                           scp_filepath: str, config: dict) -> dict[str, bool]:
-    """Import SCP to multiple target iDRACs sequentially.
+    """Import SCP to multiple target iDRACs concurrently.
+
+    Up to connection.max_concurrency targets (default 32) are imported at
+    the same time; the work is almost entirely waiting on the network.
 
     Args:
         targets: List of target IP addresses.
@@ -106,55 +120,100 @@ def import_scp_to_targets(targets: list[str], username: str, password: str,
     imp = config.get("import", {})
     export_cfg = config.get("export", {})
 
-    results: dict[str, bool] = {}
+    # Settings are identical for every target; resolve them once
+    sess_kwargs = session_kwargs(conn)
+    import_kwargs = {
+        "target": export_cfg.get("target", "ALL"),
+        "shutdown_type": imp.get("shutdown_type", "Graceful"),
+        "host_power_state": imp.get("host_power_state", "On"),
+        "poll_interval": conn.get("poll_interval", 15),
+        "job_timeout": conn.get("job_timeout", 1800),
+        "initial_poll_interval": conn.get("initial_poll_interval", 1.0),
+    }
+
+    # An IP listed twice (or covered by overlapping ranges) is imported once;
+    # an iDRAC runs only one SCP job at a time
+    targets = list(dict.fromkeys(targets))
     total = len(targets)
 
     logger.info("=" * 60)
     logger.info("IMPORTING GOLDEN TEMPLATE TO %d TARGET(S)", total)
     logger.info("=" * 60)
 
-    for idx, ip in enumerate(targets, 1):
-        logger.info("")
-        logger.info("[%d/%d] Processing target: %s", idx, total, ip)
-        logger.info("-" * 40)
-
+    # The template is identical for every target; read and collapse it once
+    try:
+        scp_content = _read_scp_file(scp_filepath)
+    except (OSError, UnicodeDecodeError):
+        logger.exception("  Cannot read SCP file %s", scp_filepath)
+        return {ip: False for ip in targets}
+    # Encode the multi-MB request body here too, before the workers start, so
+    # every target posts the same bytes
+    body = _import_payload(scp_content, import_kwargs["target"], import_kwargs["shutdown_type"],
+                           import_kwargs["host_power_state"]) if scp_content else None
+
+    def _import_target(ip: str) -> bool:
+        logger.info("\nProcessing target: %s\n%s", ip, "-" * 40)
         try:
-            session = IdracSession(
-                ip=ip,
-                username=username,
-                password=password,
-                verify_ssl=conn.get("verify_ssl", False),
-                timeout=conn.get("timeout", 30),
-                retries=conn.get("retries", 3),
-            )
-            ok = import_scp(
-                session=session,
-                scp_filepath=scp_filepath,
-                target=export_cfg.get("target", "ALL"),
-                shutdown_type=imp.get("shutdown_type", "Graceful"),
-                host_power_state=imp.get("host_power_state", "On"),
-                poll_interval=conn.get("poll_interval", 15),
-                job_timeout=conn.get("job_timeout", 1800),
-            )
-            results[ip] = ok
+            with IdracSession(ip=ip, username=username, password=password, **sess_kwargs) as session:
+                return import_scp(session=session, scp_filepath=scp_filepath,
+                                  scp_content=scp_content, body=body, **import_kwargs)
         except Exception:
             logger.exception("  Unhandled error importing to %s", ip)
-            results[ip] = False
+            return False
 
-    return results
+    done: dict[str, bool] = {}
+    workers = max(1, min(conn.get("max_concurrency", 32), total))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_import_target, ip): ip for ip in targets}
+        for future in as_completed(futures):
+            ip = futures[future]
+            done[ip] = future.result()
+            logger.info("[%d/%d] Target %s finished: %s",
+                        len(done), total, ip, "OK" if done[ip] else "FAILED")
+
+    # Report in the configured target order, not completion order
+    return {ip: done[ip] for ip in targets}
+
+
+def _import_payload(scp_content: str, target: str, shutdown_type: str,
+                    host_power_state: str) -> bytes:
+    """Serialise the ImportSystemConfiguration request body."""
+    payload = {
+        "ImportBuffer": scp_content,
+        "ShutdownType": shutdown_type,
+        "HostPowerState": host_power_state,
+        "ShareParameters": {
+            "Target": target,
+        },
+    }
+    return json.dumps(payload).encode("utf-8")
 
 
 def _read_scp_file(filepath: str) -> str:
     """Read an SCP file and collapse it into a single-line string for the ImportBuffer.
 
     Dell's Redfish import expects the XML/JSON as a single-line string
-    in the ImportBuffer field.
+    in the ImportBuffer field.  The result is cached per (path, mtime, size)
+    so a fleet import reads and collapses the file only once.
     """
-    with open(filepath, "r", encoding="utf-8") as f:
-        content = f.read()
+    st = os.stat(filepath)
+    return _collapse_scp_file(filepath, st.st_mtime_ns, st.st_size)
 
-    # Collapse whitespace between XML tags (mirrors Dell reference script)
-    content = re.sub(r">\s+<", "><", content)
-    content = re.sub(r"\n", "", content)
 
-    return content.strip()
+@functools.lru_cache(maxsize=4)
+def _collapse_scp_file(filepath: str, mtime_ns: int, size: int) -> str:
+    if size == 0:
+        return ""
+
+    # Collapse whitespace between XML tags (mirrors Dell reference script)
+    # straight from the memory-mapped file, so the raw file is never copied
+    # into a separate bytes object; then drop the remaining line breaks with
+    # a C-level byte translation
+    with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if mm.find(b"\n") == -1 and mm.find(b"\r") == -1 and not _WS_BETWEEN_TAGS.search(mm):
+            # Already single-line (e.g. an iDRAC XML export): nothing to collapse
+            data = mm[:]
+        else:
+            data = _WS_BETWEEN_TAGS.sub(b"><", mm).translate(None, b"\r\n")
+
+    return data.strip().decode("utf-8")